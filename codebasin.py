@@ -5,6 +5,7 @@
 This script is the main executable of Code Base Investigator.
 
 usage: codebasin.py [-h] [-c FILE] [-v] [-q] [-r DIR] [-R REPORT [REPORT ...]]
+                    [--cache]
 
 optional arguments:
   -h, --help            show this help message and exit
@@ -16,19 +17,21 @@ optional arguments:
                         Set working root directory (default .)
   -R REPORT [REPORT ...], --report REPORT [REPORT ...]
                         desired output reports (default: all)
+  --cache               reuse results from previous runs if no files changed
 """
 
 import argparse
 import os
 import sys
 import logging
+import sqlite3
 
-from codebasin import config, finder, report, util, walkers
+from codebasin import cache, config, finder, report, util, walkers
 
 version = 1.0
 
 
-def report_enabled(name):
+def report_enabled(args, name):
     """
     Return true if the report with the specified name is enabled.
     """
@@ -56,8 +59,62 @@ def guess_project_name(config_path):
     return res
 
 
-if __name__ == '__main__':
+def analyze(rootdir, codebase, configuration):
+    """
+    Parse the code base and count lines for each platform set.
+    Return a (state, setmap) tuple.
+    """
+    # Parse the source tree, and determine source line associations.
+    # The trees and associations are housed in state.
+    state = finder.find(rootdir, codebase, configuration)
 
+    # Count lines for platforms
+    platform_mapper = walkers.PlatformMapper(codebase)
+    setmap = platform_mapper.walk(state)
+
+    return state, setmap
+
+
+def cached_analyze(project_name, rootdir, codebase, configuration):
+    """
+    As analyze(), but reuse the set map from a previous run if none of
+    the files it was built from have changed. Problems with the cache
+    are logged, and fall back to analyzing the code base.
+    Return the set map.
+    """
+    log = logging.getLogger("codebasin")
+    cfg_hash = cache.config_hash(version, rootdir, codebase, configuration)
+
+    setmap_cache = None
+    setmap = None
+    try:
+        try:
+            setmap_cache = cache.SetMapCache(cache.default_path(project_name))
+            setmap = setmap_cache.lookup(cfg_hash)
+        except (sqlite3.Error, OSError) as e:
+            log.warning("Could not read cache: %s", e)
+
+        if setmap is not None:
+            log.info("Using cached set map; skipping parsing.")
+            return setmap
+
+        state, setmap = analyze(rootdir, codebase, configuration)
+        if setmap_cache is not None:
+            try:
+                setmap_cache.store(cfg_hash, state.get_filenames(), setmap)
+            except sqlite3.Error as e:
+                log.warning("Could not write cache: %s", e)
+        return setmap
+    finally:
+        if setmap_cache is not None:
+            setmap_cache.close()
+
+
+def main(argv=None):
+    """
+    Run Code Base Investigator with the given command-line arguments
+    (default: sys.argv[1:]). Return the exit status.
+    """
     # Read command-line arguments
     parser = argparse.ArgumentParser(description="Code Base Investigator v" + str(version))
     parser.add_argument('-c', '--config', dest='config_file', metavar='FILE', action='store',
@@ -72,11 +129,10 @@ if __name__ == '__main__':
     parser.add_argument('-R', '--report', dest='reports', metavar='REPORT', default=['all'],
                         choices=['all', 'summary', 'clustering'], nargs='+',
                         help='desired output reports (default: all)')
-    args = parser.parse_args()
+    parser.add_argument('--cache', dest='cache', action='store_true', default=False,
+                        help='reuse results from previous runs if no files changed')
+    args = parser.parse_args(argv)
 
-    stdout_log = logging.StreamHandler(sys.stdout)
-    stdout_log.setFormatter(logging.Formatter('[%(levelname)-8s] %(message)s'))
-    logging.getLogger("codebasin").addHandler(stdout_log)
     logging.getLogger("codebasin").setLevel(
         max(1, logging.WARNING - 10 * (args.verbose - args.quiet)))
     rootdir = os.path.realpath(args.rootdir)
@@ -85,30 +141,39 @@ if __name__ == '__main__':
     if not util.ensure_yaml(args.config_file):
         logging.getLogger("codebasin").error(
             "Configuration file does not have YAML file extension.")
-        sys.exit(1)
+        return 1
     codebase, configuration = config.load(args.config_file, rootdir)
 
-    # Parse the source tree, and determine source line associations.
-    # The trees and associations are housed in state.
-    state = finder.find(rootdir, codebase, configuration)
+    project_name = guess_project_name(args.config_file)
 
-    # Count lines for platforms
-    platform_mapper = walkers.PlatformMapper(codebase)
-    setmap = platform_mapper.walk(state)
+    if args.cache:
+        setmap = cached_analyze(project_name, rootdir, codebase, configuration)
+    else:
+        _, setmap = analyze(rootdir, codebase, configuration)
 
-    output_prefix = os.path.realpath(guess_project_name(args.config_file))
+    output_prefix = os.path.realpath(project_name)
 
     # Print summary report
-    if report_enabled("summary"):
+    if report_enabled(args, "summary"):
         summary = report.summary(setmap)
         if summary is not None:
             print(summary)
 
     # Print clustering report
-    if report_enabled("clustering"):
+    if report_enabled(args, "clustering"):
         clustering_output_name = output_prefix + "-dendrogram.png"
         clustering = report.clustering(clustering_output_name, setmap)
         if clustering is not None:
             print(clustering)
 
-    sys.exit(0)
+    return 0
+
+
+if __name__ == '__main__':
+    # Configured here, rather than in main(), so that repeated calls to
+    # main() do not attach duplicate handlers.
+    stdout_log = logging.StreamHandler(sys.stdout)
+    stdout_log.setFormatter(logging.Formatter('[%(levelname)-8s] %(message)s'))
+    logging.getLogger("codebasin").addHandler(stdout_log)
+
+    sys.exit(main())
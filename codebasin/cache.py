@@ -0,0 +1,115 @@
+# Copyright (C) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Contains a persistent cache of platform set maps, so that repeated runs
+over an unchanged code base can skip parsing and walking source files.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+
+log = logging.getLogger("codebasin")
+
+# Incremented whenever the stored format changes.
+SCHEMA_VERSION = 1
+
+
+def default_path(project):
+    """
+    Return the default cache file path for the named project.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME",
+                                os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "codebasin", project + ".sqlite")
+
+
+def config_hash(version, rootdir, codebase, configuration):
+    """
+    Return a hash of everything that affects the analysis except for the
+    contents of the source files, including the analyzer version.
+    """
+    blob = json.dumps([SCHEMA_VERSION, version, rootdir, codebase, configuration],
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def file_hash(fn):
+    """
+    Return a hash of the contents of a file, or None if it cannot be read.
+    """
+    chunk_size = 4096
+    hasher = hashlib.sha256()
+    try:
+        with open(fn, 'rb') as in_file:
+            for chunk in iter(lambda: in_file.read(chunk_size), b""):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+class SetMapCache():
+    """
+    Stores the platform set map produced for a configuration, along with
+    the hash of every file parsed to produce it. A stored set map is only
+    returned if none of those files have changed.
+
+    Files that were not parsed are not tracked, so adding a new header
+    that shadows an existing one on an include path is not detected.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        try:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS setmaps ("
+                                    "cfg_hash TEXT PRIMARY KEY, "
+                                    "file_hashes TEXT, "
+                                    "setmap TEXT)")
+        except sqlite3.Error:
+            self.connection.close()
+            raise
+
+    def close(self):
+        """
+        Close the underlying database.
+        """
+        self.connection.close()
+
+    def lookup(self, cfg_hash):
+        """
+        Return the set map stored for a configuration hash, or None if
+        there is no entry or any of its files have changed.
+        """
+        row = self.connection.execute(
+            "SELECT file_hashes, setmap FROM setmaps WHERE cfg_hash = ?",
+            (cfg_hash,)).fetchone()
+        if row is None:
+            return None
+
+        file_hashes = json.loads(row[0])
+        for (fn, digest) in file_hashes.items():
+            if file_hash(fn) != digest:
+                log.info("Cached result is stale: %s has changed.", fn)
+                return None
+
+        setmap = collections.defaultdict(int)
+        for (platforms, count) in json.loads(row[1]):
+            setmap[frozenset(platforms)] = count
+        return setmap
+
+    def store(self, cfg_hash, filenames, setmap):
+        """
+        Store the set map for a configuration hash, recording the current
+        hash of each file that was parsed to produce it.
+        """
+        file_hashes = {fn: file_hash(fn) for fn in filenames}
+        rows = [[sorted(platforms), count] for (platforms, count) in setmap.items()]
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO setmaps VALUES (?, ?, ?)",
+                (cfg_hash, json.dumps(file_hashes), json.dumps(rows)))
@@ -383,6 +383,13 @@ class Node():
     Contains a single parent, and an ordered list of children.
     """
 
+    # Whether this node starts, continues or ends a multi-branch tree
+    # (e.g. #if, #else, #endif). Fixed per node type; checked per node
+    # while walking, so these are attributes rather than method calls.
+    is_start = False
+    is_cont = False
+    is_end = False
+
     def __init__(self):
         self.children = []
         self.parent = None
@@ -391,29 +398,26 @@ class Node():
         self.children.append(child)
         child.parent = self
 
-    @staticmethod
-    def is_start_node():
+    def is_start_node(self):
         """
         Used to determine if a node is a start node of a tree.
         Return False by default.
         """
-        return False
+        return self.is_start
 
-    @staticmethod
-    def is_cont_node():
+    def is_cont_node(self):
         """
         Used to determine if a node is a continue node of a tree.
         Return False by default.
         """
-        return False
+        return self.is_cont
 
-    @staticmethod
-    def is_end_node():
+    def is_end_node(self):
         """
         Used to determine if a node is a end node of a tree.
         Return False by default.
         """
-        return False
+        return self.is_end
 
     # pylint: disable=no-self-use,unused-argument
     def evaluate_for_platform(self, **kwargs):
@@ -664,15 +668,13 @@ class IfNode(DirectiveNode):
     Represents an #if, #ifdef or #ifndef directive.
     """
 
+    is_start = True
+
     def __init__(self, tokens):
         super().__init__()
         self.kind = "if"
         self.tokens = tokens
 
-    @staticmethod
-    def is_start_node():
-        return True
-
     def __repr__(self):
         return "DirectiveNode(kind={0!r},tokens={1!r})".format(self.kind, self.tokens)
 
@@ -692,32 +694,25 @@ class ElIfNode(IfNode):
     Represents an #elif directive.
     """
 
+    is_start = False
+    is_cont = True
+
     def __init__(self, tokens):
         super().__init__(tokens)
         self.kind = "elif"
 
-    @staticmethod
-    def is_start_node():
-        return False
-
-    @staticmethod
-    def is_cont_node():
-        return True
-
 
 class ElseNode(DirectiveNode):
     """
     Represents an #else directive.
     """
 
+    is_cont = True
+
     def __init__(self):
         super().__init__()
         self.kind = "else"
 
-    @staticmethod
-    def is_cont_node():
-        return True
-
     def __repr__(self):
         return "DirectiveNode(kind={0!r})".format(self.kind)
 
@@ -733,14 +728,12 @@ class EndIfNode(DirectiveNode):
     Represents an #endif directive.
     """
 
+    is_end = True
+
     def __init__(self):
         super().__init__()
         self.kind = "endif"
 
-    @staticmethod
-    def is_end_node():
-        return True
-
     def __repr__(self):
         return "DirectiveNode(kind={0!r})".format(self.kind)
 
@@ -4,6 +4,7 @@
 Contains functions for generating command-line reports.
 """
 
+import collections
 import itertools as it
 import logging
 
@@ -49,7 +50,9 @@ def table(headers, rows):
 
 def distance(setmap, p1, p2):
     """
-    Compute distance between two platforms
+    Compute distance between two platforms.
+    This is the reference definition; reports use the equivalent (and
+    cheaper) mask_distance.
     """
     total = 0
     for (pset, count) in setmap.items():
@@ -62,17 +65,61 @@ def distance(setmap, p1, p2):
     return d
 
 
-def divergence(setmap):
+def platform_masks(setmap, platforms):
     """
-    Compute code divergence as defined by Harrell and Kitson
-    i.e. average of pair-wise distances between platform sets
+    Encode each platform set in a set map as a bitmask, with bit i set
+    if platforms[i] is in the set. Return a map of bitmasks to counts.
     """
-    platforms = extract_platforms(setmap)
+    bits = {p: 1 << i for (i, p) in enumerate(platforms)}
+    maskmap = collections.defaultdict(int)
+    for (pset, count) in setmap.items():
+        mask = 0
+        for p in pset:
+            mask |= bits[p]
+        maskmap[mask] += count
+    return maskmap
+
 
+def mask_distance(maskmap, b1, b2):
+    """
+    Compute distance between two platforms, given a map of bitmasks to
+    counts and the bits representing each platform
+    """
+    either = b1 | b2
+    total = 0
+    for (mask, count) in maskmap.items():
+        if mask & either:
+            total += count
+    d = 0
+    for (mask, count) in maskmap.items():
+        if (not mask & b1) != (not mask & b2):
+            d += count / float(total)
+    return d
+
+
+def distance_matrix(setmap, platforms):
+    """
+    Compute the matrix of pair-wise distances between platforms
+    """
+    maskmap = platform_masks(setmap, platforms)
+    nplatforms = len(platforms)
+    matrix = [[0.0] * nplatforms for _ in range(nplatforms)]
+    for (i1, i2) in it.combinations(range(nplatforms), 2):
+        d = mask_distance(maskmap, 1 << i1, 1 << i2)
+        matrix[i1][i2] = d
+        matrix[i2][i1] = d
+    return matrix
+
+
+def matrix_divergence(matrix):
+    """
+    Compute code divergence from a matrix of pair-wise distances
+    i.e. average of its off-diagonal entries
+    """
     d = 0
     npairs = 0
-    for (p1, p2) in it.combinations(platforms, 2):
-        d += distance(setmap, p1, p2)
+    for (i1, i2) in it.combinations(range(len(matrix)), 2):
+        d += matrix[i1][i2]
         npairs += 1
 
     if npairs == 0:
@@ -80,6 +127,15 @@ def divergence(setmap):
     return d / float(npairs)
 
 
+def divergence(setmap):
+    """
+    Compute code divergence as defined by Harrell and Kitson
+    i.e. average of pair-wise distances between platform sets
+    """
+    platforms = extract_platforms(setmap)
+    return matrix_divergence(distance_matrix(setmap, platforms))
+
+
 def summary(setmap):
     """
     Produce a summary report for the platform set
@@ -88,18 +144,16 @@ def summary(setmap):
 
     total = sum(setmap.values())
     data = []
-    total_count = 0
     for pset in sorted(setmap.keys(), key=len):
         name = "{%s}" % (", ".join(pset))
         count = "%d" % (setmap[pset])
         percent = "%.2f" % ((float(setmap[pset]) / float(total)) * 100)
         data += [[name, count, percent]]
-        total_count += setmap[pset]
     lines += [table(["Platform Set", "LOC", "% LOC"], data)]
 
     lines += ["Code Divergence: %.2f" % (divergence(setmap))]
-    lines += ["Unused Code (%%): %.2f" % ((setmap[frozenset()] / total_count) * 100.0)]
-    lines += ["Total SLOC: %d" % (total_count)]
+    lines += ["Unused Code (%%): %.2f" % ((setmap[frozenset()] / total) * 100.0)]
+    lines += ["Total SLOC: %d" % (total)]
 
     return "\n".join(lines)
 
@@ -128,7 +182,7 @@ def clustering(output_name, setmap):
     from scipy.spatial.distance import squareform
 
     # Compute distance matrix between platforms
-    matrix = [[distance(setmap, p1, p2) for p2 in platforms] for p1 in platforms]
+    matrix = distance_matrix(setmap, platforms)
 
     # Print distance matrix as a table
     lines = []
@@ -144,7 +198,7 @@ def clustering(output_name, setmap):
     fig, ax = plt.subplots()
     hierarchy.dendrogram(clusters, labels=platforms)
     ax.set_ylim(ymin=0, ymax=1)
-    ax.axhline(y=divergence(setmap), linestyle='--', label="Average")
+    ax.axhline(y=matrix_divergence(matrix), linestyle='--', label="Average")
     ax.legend()
     plt.xlabel("Platform")
     plt.ylabel("Code Divergence")
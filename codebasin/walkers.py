@@ -18,15 +18,24 @@ class NodeAssociation():
     are contained here.
     """
 
+    __slots__ = ('platforms', 'frozen')
+
     def __init__(self):
         self.platforms = set()
+        self.frozen = None
 
     def add_platform(self, _platform):
         """
         Add a platform to the list of associated platforms.
         """
-        if _platform not in self.platforms:
-            self.platforms.update([_platform])
+        self.platforms.add(_platform)
+
+    def freeze(self):
+        """
+        Store a frozenset of the associated platforms.
+        Should be called once all platforms have been added.
+        """
+        self.frozen = frozenset(self.platforms)
 
 
 class NodeAssociationMap():
@@ -34,32 +43,55 @@ class NodeAssociationMap():
     Contains a map of the node associations for a specific tree.
     The map of trees to NodeAssociationMap happens as at higher
     level, and then each node's association map is housed here.
+
+    Associations are stored as an attribute on each node (tagged with
+    this map's id), rather than in a dictionary keyed by node.
     """
 
+    __slots__ = ('_key', '_node_associations')
+
     def __init__(self):
-        self._node_associations = {}
+        self._key = "_assoc_{}".format(id(self))
+        self._node_associations = []
+
+    @property
+    def key(self):
+        """
+        The name of the node attribute holding this map's associations.
+        """
+        return self._key
 
     def prepare_node(self, _node):
         """
         Create an empty node association map for a node.
         """
-        if _node not in self._node_associations:
-            self._node_associations[_node] = NodeAssociation()
+        if not hasattr(_node, self._key):
+            association = NodeAssociation()
+            setattr(_node, self._key, association)
+            self._node_associations.append(association)
 
     def add_platform(self, _node, _platform):
         """
         Add a platform association to a node
         """
-        self.prepare_node(_node)
-        self._node_associations[_node].add_platform(_platform)
+        association = getattr(_node, self._key, None)
+        if association is None:
+            self.prepare_node(_node)
+            association = getattr(_node, self._key)
+        association.add_platform(_platform)
 
     def get_association(self, _node):
         """
         Return the association class for a node.
         """
-        if _node in self._node_associations:
-            return self._node_associations[_node]
-        return None
+        return getattr(_node, self._key, None)
+
+    def freeze(self):
+        """
+        Freeze the platform sets of all associations in this map.
+        """
+        for association in self._node_associations:
+            association.freeze()
 
 
 class TreeWalker():
@@ -67,6 +99,8 @@ class TreeWalker():
     Generic tree walker class.
     """
 
+    __slots__ = ('tree', '_node_associations')
+
     def __init__(self, _tree, _node_associations):
         self.tree = _tree
         self._node_associations = _node_associations
@@ -78,6 +112,8 @@ class TreePrinter(TreeWalker):
     (with appropriate indentation).
     """
 
+    __slots__ = ()
+
     def walk(self):
         """
         Walk the tree, printing each node.
@@ -88,9 +124,7 @@ class TreePrinter(TreeWalker):
         """
         Print this specific node, then descend into it's children nodes.
         """
-        spacing = ''
-        for _ in range(level):
-            spacing = '  {}'.format(spacing)
+        spacing = '  ' * level
 
         association = self._node_associations.get_association(node)
         if association:
@@ -109,43 +143,51 @@ class TreeAssociator(TreeWalker):
     Specific TreeWalker that build associations with platforms.
     """
 
+    __slots__ = ()
+
     def walk(self, platform, state):
         """
         Walk the tree, associating nodes with platforms
         """
-        _ = self._associate_nodes(self.tree.root, platform, state, True)
-
-    def _associate_nodes(self, node, platform, state, process_children):
-        """
-        Associate this node with the platform. Evaluate the node,
-        and (if the evaluation say to) descend into the children nodes.
-        """
-        self._node_associations.add_platform(node, platform.name)
-
-        node_processed = False
-        eval_args = {'platform': platform,
-                     'filename': self.tree.root.filename,
-                     'state': state}
-
-        if process_children and node.evaluate_for_platform(**eval_args):
-            # node_processed tells us if a child node was processed.
-            # This is useful for tracking which branch was taken in a
-            # multi-branch directive.
-            node_processed = True
-
-            # process_child is used to ignore children of branch nodes
-            # that shouldn't be evaluated because a previous branch was
-            # taken
-            process_child = True
-            for child in node.children:
-                child_processed = self._associate_nodes(child, platform, state, process_child)
-
-                if child_processed and (child.is_start_node() or child.is_cont_node()):
-                    process_child = False
-                elif not process_child and child.is_end_node():
-                    process_child = True
-
-        return node_processed
+        # These are invariant for the whole walk, so are bound once here
+        # and captured by associate_nodes below.
+        filename = self.tree.root.filename
+        platform_name = platform.name
+        add_platform = self._node_associations.add_platform
+
+        def associate_nodes(node, process_children):
+            """
+            Associate this node with the platform. Evaluate the node,
+            and (if the evaluation say to) descend into the children nodes.
+            """
+            add_platform(node, platform_name)
+
+            node_processed = False
+
+            if process_children and node.evaluate_for_platform(platform=platform,
+                                                               filename=filename,
+                                                               state=state):
+                # node_processed tells us if a child node was processed.
+                # This is useful for tracking which branch was taken in a
+                # multi-branch directive.
+                node_processed = True
+
+                # depth is used to ignore children of branch nodes that
+                # shouldn't be evaluated because a previous branch was
+                # taken. It is non-zero from a taken branch until the
+                # matching end.
+                depth = 0
+                for child in node.children:
+                    child_processed = associate_nodes(child, depth == 0)
+
+                    if child_processed and (child.is_start or child.is_cont):
+                        depth += 1
+                    elif child.is_end and depth > 0:
+                        depth -= 1
+
+            return node_processed
+
+        _ = associate_nodes(self.tree.root, True)
 
 
 class TreeMapper(TreeWalker):
@@ -154,22 +196,31 @@ class TreeMapper(TreeWalker):
     lines of code each is associated with.
     """
 
+    __slots__ = ('line_map', '_walked')
+
     def __init__(self, _tree, _node_associations):
         super().__init__(_tree, _node_associations)
         self.line_map = collections.defaultdict(int)
+        self._walked = False
 
     def walk(self, state):
         """
         Generic tree mapping method. Returns the constructed map.
+        The map is only built on the first call.
         """
-        if not self.line_map:
+        if not self._walked:
             for fn in state.get_filenames():
-                self._map_node(state.get_tree(fn).root, state.get_map(fn))
+                # Platform sets are final once walking starts; freeze
+                # them so that mappers can use them as keys.
+                _map = state.get_map(fn)
+                _map.freeze()
+                self._map_tree(state.get_tree(fn), _map)
+            self._walked = True
         return self.line_map
 
-    def _map_node(self, node, _map):
+    def _map_tree(self, tree, _map):
         """
-        Map a specific node, and descend into the children nodes.
+        Map the nodes of a specific tree.
         """
         # pass
 
@@ -177,32 +228,56 @@ class TreeMapper(TreeWalker):
 class PlatformMapper(TreeMapper):
     """
     Specific TreeMapper that builds a mapping of nodes to platforms.
+
+    Mapping is deliberately a separate pass from association: a node's
+    platform set is only final once every platform has been processed
+    (and include files are associated on demand, from within other
+    walks), so line counts cannot be committed while associating.
     """
 
+    __slots__ = ('codebase', '_null_set', '_codebase_files')
+
     def __init__(self, codebase, _tree=None, _node_associations=None):
         super().__init__(_tree, _node_associations)
         self.codebase = codebase
         self._null_set = frozenset([])
+        self._codebase_files = frozenset(codebase["files"])
 
-    def _map_node(self, _node, _map):
+    def _map_tree(self, tree, _map):
         """
-        Map a specific node to its platform set, and descend into the
-        children nodes.
+        Map each node of a specific tree to its platform set. Uses an
+        explicit stack rather than recursion, to avoid per-node call
+        overhead and recursion limits on deep trees.
         """
         # Do not map files that the user does not consider to be part of
-        # the codebase
-        if type(_node).__name__ == 'FileNode' and _node.filename not in self.codebase["files"]:
+        # the codebase. Only the root of a tree can be a FileNode.
+        if tree.root.filename not in self._codebase_files:
             return
 
-        # This is equivalent to isinstance(CodeNode), without needing to
-        # import lexer.
-        if 'num_lines' in dir(_node) and type(_node).__name__ != 'FileNode':
-            association = _map.get_association(_node)
-            if association:
-                platform = frozenset(association.platforms)
-                self.line_map[platform] += _node.num_lines
-            else:
-                self.line_map[self._null_set] += _node.num_lines
-
-        for child in _node.children:
-            self._map_node(child, _map)
+        # Imported here to avoid a circular import at module load time.
+        from .preprocessor import CodeNode
+
+        # Children are pushed in reverse so that nodes are visited (and
+        # line_map keys inserted) in source order, as a recursive walk
+        # would.
+        stack = collections.deque(reversed(tree.root.children))
+        stack_pop = stack.pop
+        stack_extend = stack.extend
+
+        # Bind loop invariants to locals; associations are read directly
+        # from the node, as NodeAssociationMap.get_association would.
+        line_map = self.line_map
+        null_set = self._null_set
+        key = _map.key
+
+        while stack:
+            node = stack_pop()
+
+            if isinstance(node, CodeNode):
+                platform = null_set
+                association = getattr(node, key, None)
+                if association:
+                    platform = association.frozen
+                line_map[platform] += node.num_lines
+
+            stack_extend(reversed(node.children))
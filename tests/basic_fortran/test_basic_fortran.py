@@ -3,7 +3,7 @@
 
 import unittest
 import logging
-from codebasin import config, finder, walkers
+from codebasin import config, finder, report, walkers
 
 
 class TestExampleFile(unittest.TestCase):
@@ -28,6 +28,16 @@ class TestExampleFile(unittest.TestCase):
         setmap = mapper.walk(state)
         self.assertDictEqual(setmap, self.expected_setmap, "Mismatch in setmap")
 
+    def test_order(self):
+        """basic_fortran/basic_fortran.yaml summary rows follow source order"""
+        codebase, configuration = config.load(
+            "./tests/basic_fortran/basic_fortran.yaml", self.rootdir)
+        state = finder.find(self.rootdir, codebase, configuration)
+        mapper = walkers.PlatformMapper(codebase)
+        setmap = mapper.walk(state)
+        rows = [line.split()[0] for line in report.summary(setmap).splitlines()]
+        self.assertLess(rows.index("{GPU}"), rows.index("{CPU}"), "Mismatch in row order")
+
 
 if __name__ == '__main__':
     unittest.main()
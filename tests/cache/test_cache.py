@@ -0,0 +1,121 @@
+# Copyright (C) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause
+
+import unittest
+from unittest import mock
+import importlib.util
+import contextlib
+import io
+import tempfile
+import shutil
+import os
+import logging
+
+from codebasin import cache, finder
+
+# codebasin.py is a script, and shares its name with the package
+spec = importlib.util.spec_from_file_location("codebasin_main", "./codebasin.py")
+codebasin_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(codebasin_main)
+
+
+class TestCache(unittest.TestCase):
+    """
+    Test that SetMapCache returns stored set maps only while the files
+    used to produce them are unchanged.
+    """
+
+    def setUp(self):
+        logging.getLogger("codebasin").disabled = True
+        self.testdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.testdir, "main.cpp")
+        with open(self.source, "w") as fp:
+            fp.write("int main() {}\n")
+
+        self.cache = cache.SetMapCache(os.path.join(self.testdir, "db", "test.sqlite"))
+        self.cfg_hash = cache.config_hash(1.0, self.testdir, {"files": [self.source]}, {})
+        self.setmap = {frozenset(['CPU', 'GPU']): 1,
+                       frozenset([]): 0}
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.testdir)
+
+    def test_miss(self):
+        """Check that an unknown configuration is not found"""
+        self.assertIsNone(self.cache.lookup(self.cfg_hash))
+
+    def test_hit(self):
+        """Check that a stored set map is returned unchanged"""
+        self.cache.store(self.cfg_hash, [self.source], self.setmap)
+        self.assertDictEqual(self.cache.lookup(self.cfg_hash), self.setmap)
+
+    def test_stale(self):
+        """Check that modifying a file invalidates the stored set map"""
+        self.cache.store(self.cfg_hash, [self.source], self.setmap)
+        with open(self.source, "a") as fp:
+            fp.write("// changed\n")
+        self.assertIsNone(self.cache.lookup(self.cfg_hash))
+
+    def test_config(self):
+        """Check that the configuration hash depends on the configuration"""
+        other = cache.config_hash(1.0, self.testdir, {"files": []}, {})
+        self.assertNotEqual(self.cfg_hash, other)
+
+    def test_version(self):
+        """Check that the configuration hash depends on the analyzer version"""
+        other = cache.config_hash(2.0, self.testdir, {"files": [self.source]}, {})
+        self.assertNotEqual(self.cfg_hash, other)
+
+
+class TestCacheMain(unittest.TestCase):
+    """
+    Test that codebasin.py --cache stores a set map on the first run and
+    reuses it, without parsing, on the next.
+    """
+
+    def setUp(self):
+        logging.getLogger("codebasin").disabled = True
+        self.testdir = tempfile.mkdtemp()
+        self.argv = ["-c", "./tests/once/once.yaml", "-r", "./tests/once/",
+                     "-R", "summary", "--cache"]
+
+    def tearDown(self):
+        shutil.rmtree(self.testdir)
+
+    def run_main(self):
+        output = io.StringIO()
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.testdir}):
+            with contextlib.redirect_stdout(output):
+                status = codebasin_main.main(self.argv)
+        self.assertEqual(status, 0)
+        return output.getvalue()
+
+    def test_main(self):
+        """Check that a second run is served from the cache"""
+        first = self.run_main()
+        self.assertTrue(os.path.exists(os.path.join(self.testdir, "codebasin", "once.sqlite")))
+
+        with mock.patch.object(finder, "find", side_effect=AssertionError("cache miss")):
+            second = self.run_main()
+        self.assertEqual(first, second)
+
+    def test_logged(self):
+        """Check that a cache hit is reported when verbose"""
+        self.run_main()
+        self.argv += ["-v"]
+        logging.getLogger("codebasin").disabled = False
+        with self.assertLogs("codebasin", level="INFO") as logs:
+            self.run_main()
+        self.assertTrue(any("Using cached set map" in line for line in logs.output))
+
+    def test_corrupt(self):
+        """Check that a corrupt cache file falls back to parsing"""
+        expected = self.run_main()
+        with open(os.path.join(self.testdir, "codebasin", "once.sqlite"), "wb") as fp:
+            fp.write(b"not a database" * 100)
+        self.assertEqual(self.run_main(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 
 import unittest
 import logging
-from codebasin import config, finder, walkers
+from codebasin import config, finder, platform, preprocessor, walkers
 
 
 class TestExampleFile(unittest.TestCase):
@@ -26,6 +26,25 @@ class TestExampleFile(unittest.TestCase):
         setmap = mapper.walk(state)
         self.assertDictEqual(setmap, self.expected_setmap, "Mismatch in setmap")
 
+    def test_walkers(self):
+        """once/once.yaml, associating via walkers instead of finder.find"""
+        codebase, configuration = config.load("./tests/once/once.yaml", self.rootdir)
+        state = finder.ParserState()
+        for f in codebase["files"]:
+            state.insert_file(f)
+        for p in configuration:
+            for e in configuration[p]:
+                file_platform = platform.Platform(p, self.rootdir)
+                for definition in e['defines']:
+                    macro = preprocessor.Macro.from_definition_string(definition)
+                    file_platform.define(macro.name, macro)
+                associator = walkers.TreeAssociator(state.get_tree(e['file']),
+                                                    state.get_map(e['file']))
+                associator.walk(file_platform, state)
+        mapper = walkers.PlatformMapper(codebase)
+        setmap = mapper.walk(state)
+        self.assertDictEqual(setmap, self.expected_setmap, "Mismatch in setmap")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+# Copyright (C) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause
+
+import unittest
+import itertools as it
+
+from codebasin import report
+
+
+class TestDistance(unittest.TestCase):
+    """
+    Test that the bitmask-based distance computations agree with the
+    set-based definition of distance.
+    """
+
+    def setUp(self):
+        self.setmap = {frozenset([]): 3,
+                       frozenset(['A']): 5,
+                       frozenset(['B']): 7,
+                       frozenset(['A', 'B']): 11,
+                       frozenset(['B', 'C']): 13,
+                       frozenset(['A', 'B', 'C']): 17}
+        self.platforms = ['A', 'B', 'C']
+
+    def test_masks(self):
+        """Check that platform sets are encoded with one bit per platform"""
+        maskmap = report.platform_masks(self.setmap, self.platforms)
+        self.assertDictEqual(maskmap, {0b000: 3, 0b001: 5, 0b010: 7,
+                                       0b011: 11, 0b110: 13, 0b111: 17})
+
+    def test_mask_distance(self):
+        """Check that mask_distance matches distance for every pair"""
+        maskmap = report.platform_masks(self.setmap, self.platforms)
+        for (i1, p1) in enumerate(self.platforms):
+            for (i2, p2) in enumerate(self.platforms):
+                self.assertAlmostEqual(report.mask_distance(maskmap, 1 << i1, 1 << i2),
+                                       report.distance(self.setmap, p1, p2))
+
+    def test_distance_matrix(self):
+        """Check that distance_matrix matches distance for every pair"""
+        matrix = report.distance_matrix(self.setmap, self.platforms)
+        for (i1, p1) in enumerate(self.platforms):
+            for (i2, p2) in enumerate(self.platforms):
+                self.assertAlmostEqual(matrix[i1][i2],
+                                       report.distance(self.setmap, p1, p2))
+
+    def test_divergence(self):
+        """Check that divergence is the mean pair-wise distance"""
+        pairs = list(it.combinations(self.platforms, 2))
+        expected = sum(report.distance(self.setmap, p1, p2) for (p1, p2) in pairs) / len(pairs)
+        self.assertAlmostEqual(report.divergence(self.setmap), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()